@@ -5,6 +5,7 @@
 # from convertor.yolo.convert_onnx_tf import yolo_convert_onnx_tf
 from convertor.yolo.convert_tf_tflite import yolo_convert_tf_tflite
 from convertor.yolo.convert_tf_onnx import yolo_convert_tf_onnx
+from convertor.yolo.convert_onnx_int8 import yolo_convert_onnx_int8
 
 IMAGE_SIZES = {
     'yolov3-tiny': 512,
@@ -48,3 +49,8 @@ if __name__ == '__main__':
             model=model,
             directory=DIRECTORY
         )
+        yolo_convert_onnx_int8(
+            model=model,
+            directory=DIRECTORY,
+            imgsize=[imgsize, imgsize]
+        )
@@ -5,6 +5,7 @@ from convertor.yolov5.convert_onnx_vino import yolov5_convert_onnx_vino
 from convertor.yolov5.convert_onnx_tf import yolov5_convert_onnx_tf
 from convertor.yolov5.convert_tf_tflite import yolov5_convert_tf_tflite
 from convertor.yolov5.convert_tf_onnx import yolov5_convert_tf_onnx
+from convertor.yolov5.convert_onnx_int8 import yolov5_convert_onnx_int8
 
 IMAGE_SIZE = 640
 DIRECTORY = 'weights/yolov5'
@@ -36,3 +37,8 @@ if __name__ == '__main__':
             model=model,
             directory=DIRECTORY
         )
+        yolov5_convert_onnx_int8(
+            model=model,
+            directory=DIRECTORY,
+            imgsize=[IMAGE_SIZE, IMAGE_SIZE]
+        )
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+from typing import List
+from utils.convert_onnx_int8 import convert_onnx_int8
+
+
+def yolo_convert_onnx_int8(
+    model: str,
+    directory: str,
+    imgsize: List[int]
+) -> None:
+    # ONNX converted from TensorFlow (tf_onnx)
+    convert_onnx_int8(
+        path_onnx=f'{directory}/tf_{model}.onnx',
+        path_quant=f'{directory}/tf_{model}.quant.onnx',
+        imgsize=imgsize
+    )
+    return
@@ -66,7 +66,13 @@ def yolov5_convert_torch_onnx(
             verbose=False,
             opset_version=12,
             input_names=['images'],
-            output_names=['output', 'output_1', 'output_2']
+            output_names=['output', 'output_1', 'output_2'],
+            dynamic_axes={
+                'images': {0: 'batch'},
+                'output': {0: 'batch'},
+                'output_1': {0: 'batch'},
+                'output_2': {0: 'batch'},
+            }
         )
         model_onnx = onnx.load(path_onnx)
         onnx.checker.check_model(model_onnx)
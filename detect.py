@@ -15,11 +15,11 @@ def main(config: Config) -> None:
     else:
         raise SystemError(f'model is incorrect ({config.model})')
     detector.print_header()
-    for sess in detector.yield_session():
-        detector.inference(sess=sess)
-        detector.print_result(sess=sess)
-        detector.dump_result(sess=sess)
-        detector.dump_image(sess=sess)
+    for batch in detector.yield_result():
+        for sess in batch:
+            detector.print_result(sess=sess)
+            detector.dump_result(sess=sess)
+            detector.dump_image(sess=sess)
     detector.close()
     return
 
@@ -44,7 +44,11 @@ if __name__ == '__main__':
     parser.add_argument(
         '-q', '--quantize', type=str, default='fp32', choices=[
             'fp32', 'fp16', 'int8'
-        ], help='quantization mode (TensorFlow Lite only)'
+        ], help='quantization mode (TensorFlow Lite, int8 for ONNX)'
+    )
+    parser.add_argument(
+        '-b', '--batch-size', type=int, default=1,
+        help='number of images to throw to the model at once'
     )
     parser.add_argument(
         '-d', '--image-dir', type=str, required=True,
@@ -70,11 +74,19 @@ if __name__ == '__main__':
         '--disable-soft-nms', action='store_true',
         help='use hard-NMS instead of soft-NMS'
     )
+    parser.add_argument(
+        '--prefer-openvino', action='store_true',
+        help='run torch on OpenVINO IR if it exists (Intel CPU only)'
+    )
     args = parser.parse_args()
     if not os.path.isdir(args.image_dir):
         raise ValueError(
             f'image directory not found ({args.image_dir})'
         )
+    if args.batch_size < 1:
+        raise ValueError(
+            f'batch size is incorrect ({args.batch_size})'
+        )
     if (args.conf_threshold < 0.0) or (args.conf_threshold >= 1.0):
         raise ValueError(
             f'confidence threshold is incorrect ({args.conf_threshold})'
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding:utf-8 -*-
 from __future__ import annotations
-from typing import Generator, Dict, Optional
+from typing import Generator, Any, List, Dict, Optional
 import os
 import time
 import glob
@@ -53,8 +53,6 @@ class Session(object):
         self.offset_height = None
         self.offset_width = None
         self.pad_image = None
-        self.yolo_input = None
-        self.yolov5_input = None
         self.crowddet_input = None
         self.elapsed_ms = None
         self.pred_count = None
@@ -106,7 +104,7 @@ class Session(object):
         else:
             interpolation = cv2.INTER_AREA
         img = cv2.resize(
-            self.fine_image.copy(),
+            self.fine_image,
             (self.image_width, self.image_height),
             interpolation=interpolation
         )
@@ -122,22 +120,13 @@ class Session(object):
         return
 
     def rescale_xyxy(self: Session, xyxy: np.ndarray) -> np.ndarray:
-        xyxy[:, 0] = np.maximum(
-            (xyxy[:, 0] - self.offset_width) / self.scale,
-            0
-        )
-        xyxy[:, 1] = np.maximum(
-            (xyxy[:, 1] - self.offset_height) / self.scale,
-            0
-        )
-        xyxy[:, 2] = np.minimum(
-            (xyxy[:, 2] - self.offset_width) / self.scale,
-            self.raw_width
-        )
-        xyxy[:, 3] = np.minimum(
-            (xyxy[:, 3] - self.offset_height) / self.scale,
-            self.raw_height
-        )
+        # rescale in place (xyxy may be a view of a larger buffer)
+        xyxy[:, 0::2] -= self.offset_width
+        xyxy[:, 1::2] -= self.offset_height
+        xyxy /= self.scale
+        np.maximum(xyxy[:, :2], 0, out=xyxy[:, :2])
+        np.minimum(xyxy[:, 2], self.raw_width, out=xyxy[:, 2])
+        np.minimum(xyxy[:, 3], self.raw_height, out=xyxy[:, 3])
         return xyxy
 
     def draw_prediction(self: Session, category_map: Dict) -> Image:
@@ -197,22 +186,26 @@ class Config(object):
         model: str,
         framework: str,
         quantize: str,
+        batch_size: int,
         image_dir: str,
         conf_threshold: float,
         iou_threshold: float,
         clarify_image: bool,
         use_superres: bool,
-        disable_soft_nms: bool
+        disable_soft_nms: bool,
+        prefer_openvino: bool
     ) -> None:
         self.model = model
         self.framework = framework
         self.quantize = quantize
+        self.batch_size = batch_size
         self.image_dir = image_dir
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
         self.clarify_image = clarify_image
         self.use_superres = use_superres
         self.disable_soft_nms = disable_soft_nms
+        self.prefer_openvino = prefer_openvino
         return
 
 
@@ -224,11 +217,44 @@ class Framework(object):
         self.config = config
         self.input_blob = list()
         self.input_shape = [None, None, None, None]
+        # number of batches which can run at the same time
+        # (frameworks without asynchronous execution run one by one)
+        self.num_requests = 1
+        # inference of the last finished batch which ran in the background
+        # before finish() waited for it (seconds)
+        self.overlapped_time = 0.0
+        # input tensors which are started but not finished yet
+        self.pending_feeds = list()
         return
 
-    def inference(self: Framework, sess: Session) -> np.ndarray:
+    def check_batch_size(self: Framework, batch_size: Any) -> None:
+        # the batch axis of the model must be dynamic or the same size
+        if isinstance(batch_size, int) and (
+            batch_size != self.config.batch_size
+        ):
+            raise SystemError(
+                f'{self.config.framework} unsupport '
+                f'batch size {self.config.batch_size}'
+            )
+        return
+
+    def inference(
+        self: Framework,
+        input_feed: Dict[str, np.ndarray]
+    ) -> np.ndarray:
         return np.empty((0, 6), dtype=float)
 
+    def start(
+        self: Framework,
+        input_feed: Dict[str, np.ndarray]
+    ) -> None:
+        # frameworks without asynchronous execution run at finish()
+        self.pending_feeds.append(input_feed)
+        return
+
+    def finish(self: Framework) -> List[np.ndarray]:
+        return self.inference(input_feed=self.pending_feeds.pop(0))
+
 
 class Model(object):
     def __init__(
@@ -238,6 +264,10 @@ class Model(object):
         self.config = config
         # self.framework= Framework(config=config)
         self.framework = None
+        # input tensors of the model shared by all images of a batch
+        # (double-buffered to prepare the next batch while running)
+        self.input_feeds = list()
+        self.input_index = 0
         self.category_map = self.read_labels()
         return
 
@@ -254,11 +284,17 @@ class Model(object):
                 }
         return category_map
 
-    def prep_image(self: Model, sess: Session) -> None:
+    def prep_image(self: Model, sess: Session, index: int) -> None:
+        return
+
+    def start(self: Model, batch: List[Session]) -> None:
+        self.framework.start(input_feed=self.input_feeds[self.input_index])
+        # the next batch will be prepared in the other buffer
+        self.input_index ^= 1
         return
 
-    def inference(self: Model, sess: Session) -> np.ndarray:
-        return self.framework.inference(sess=sess)
+    def finish(self: Model, batch: List[Session]) -> List[np.ndarray]:
+        return self.framework.finish()
 
 
 class Detector(object):
@@ -269,16 +305,12 @@ class Detector(object):
         self.config = config
         # self.model = Model(config=config)
         self.model = None
+        # time spent on starting the batches in flight
+        self.start_elapsed = list()
         dataset_name = config.image_dir.split(os.sep)[-1]
-        if self.config.framework == 'tflite':
-            self.result_dir = 'results/%s/%s_%s_%s' % (
-                dataset_name, config.model,
-                config.framework, config.quantize
-            )
-        else:
-            self.result_dir = 'results/%s/%s_%s' % (
-                dataset_name, config.model, config.framework
-            )
+        self.result_dir = 'results/%s/%s_%s' % (
+            dataset_name, config.model, self.framework_name()
+        )
         os.makedirs(self.result_dir, exist_ok=True)
         self.sr = None
         if config.use_superres:
@@ -290,14 +322,22 @@ class Detector(object):
         ), 'wt')
         return
 
+    def framework_name(self: Detector) -> str:
+        # TensorFlow Lite always has the quantization mode
+        # ONNX Runtime has it only if the model is quantized
+        if (
+            self.config.framework == 'tflite'
+        ) or (
+            self.config.framework in ['torch_onnx', 'tf_onnx']
+            and self.config.quantize == 'int8'
+        ):
+            return f'{self.config.framework}_{self.config.quantize}'
+        return self.config.framework
+
     def print_header(self: Detector) -> None:
-        if self.config.framework == 'tflite':
-            framework = f'{self.config.framework}_{self.config.quantize}'
-        else:
-            framework = self.config.framework
         print(
             '=== MODEL: %s, FRAMEWORK: %s ===' % (
-                self.config.model, framework
+                self.config.model, self.framework_name()
             )
         )
         return
@@ -313,30 +353,77 @@ class Detector(object):
             )
         return
 
-    def prep_image(self: Detector, sess: Session) -> None:
-        sess.clarify_image(sr=self.sr)
-        self.model.prep_image(sess=sess)
+    def yield_batch(self: Detector) -> Generator[List[Session], None, None]:
+        batch = list()
+        for sess in self.yield_session():
+            batch.append(sess)
+            if len(batch) == self.config.batch_size:
+                yield batch
+                batch = list()
+        if len(batch) > 0:
+            yield batch
+        return
+
+    def prep_image(self: Detector, batch: List[Session]) -> None:
+        for index, sess in enumerate(batch):
+            sess.clarify_image(sr=self.sr)
+            self.model.prep_image(sess=sess, index=index)
         return
 
-    def inference(self: Detector, sess: Session) -> None:
+    def start(self: Detector, batch: List[Session]) -> None:
         # image preprocessing
-        self.prep_image(sess=sess)
+        self.prep_image(batch=batch)
         # inference
         start_time = time.perf_counter()
-        pred = self.model.inference(sess=sess)
-        pred = filter_bboxes(
-            pred,
-            conf_threshold=self.config.conf_threshold,
-            iou_threshold=self.config.iou_threshold,
-            disable_soft_nms=self.config.disable_soft_nms
-        )
+        self.model.start(batch=batch)
         end_time = time.perf_counter()
-        # sort bounding boxes by confidence ascending
-        pred = pred[np.argsort(pred[:, 5])]
-        # results of this session
-        sess.elapsed_ms = int(round((end_time - start_time) * 1000))
-        sess.pred_count = pred.shape[0]
-        sess.pred_bboxes = pred
+        self.start_elapsed.append(end_time - start_time)
+        return
+
+    def finish(self: Detector, batch: List[Session]) -> None:
+        start_time = time.perf_counter()
+        preds = self.model.finish(batch=batch)
+        preds = [
+            filter_bboxes(
+                pred,
+                conf_threshold=self.config.conf_threshold,
+                iou_threshold=self.config.iou_threshold,
+                disable_soft_nms=self.config.disable_soft_nms
+            ) for pred in preds
+        ]
+        end_time = time.perf_counter()
+        # time spent on this batch only (reading and preprocessing
+        # other batches are not counted, but the inference which ran
+        # behind them is)
+        elapsed = self.start_elapsed.pop(0) + end_time - start_time
+        elapsed += self.model.framework.overlapped_time
+        # elapsed time is divided equally among the images of the batch
+        elapsed_ms = elapsed * 1000 / len(batch)
+        for sess, pred in zip(batch, preds):
+            # sort bounding boxes by confidence ascending
+            pred = pred[np.argsort(pred[:, 5])]
+            # results of this session
+            sess.elapsed_ms = int(round(elapsed_ms))
+            sess.pred_count = pred.shape[0]
+            sess.pred_bboxes = pred
+        return
+
+    def yield_result(self: Detector) -> Generator[List[Session], None, None]:
+        # asynchronous frameworks start the next batch
+        # before the previous batch is finished
+        num_requests = self.model.framework.num_requests
+        pending = list()
+        for batch in self.yield_batch():
+            self.start(batch=batch)
+            pending.append(batch)
+            if len(pending) == num_requests:
+                finished = pending.pop(0)
+                self.finish(batch=finished)
+                yield finished
+        while len(pending) > 0:
+            finished = pending.pop(0)
+            self.finish(batch=finished)
+            yield finished
         return
 
     def print_result(self: Detector, sess: Session) -> None:
@@ -348,10 +435,7 @@ class Detector(object):
         return
 
     def dump_result(self: Detector, sess: Session) -> None:
-        if self.config.framework == 'tflite':
-            framework = f'{self.config.framework}_{self.config.quantize}'
-        else:
-            framework = self.config.framework
+        framework = self.framework_name()
         bboxes = list()
         for pbox in sess.pred_bboxes.tolist():
             box = [
@@ -1,16 +1,13 @@
 #!/usr/bin/env python
 # -*- coding:utf-8 -*-
 from __future__ import annotations
-from typing import List, Tuple
+from typing import List, Dict
 from detector.base import Session, Config, Framework, Model, Detector
 import os
+import time
 import numpy as np
-import onnxruntime as rt
-import torch
-import tensorflow as tf
-from models.tf_yolov5 import WrapperYoloV5
-from openvino.inference_engine import IECore
-from utils.convert_tflite import load_frozen_graph
+from numba import njit, prange
+from utils.category import argmax_conf
 
 IMAGE_SIZES = {
     'yolov3-tiny': 512,
@@ -68,89 +65,196 @@ STRIDE_XYSCALES = {
 path_wt = 'weights/yolo'
 
 
-def sigmoid(x: np.ndarray) -> np.ndarray:
+@njit(fastmath=True, cache=True)
+def sigmoid(x: float) -> float:
     sigmoid_range = 34.538776394910684
-    x = np.clip(x, -sigmoid_range, sigmoid_range)
+    x = min(max(x, -sigmoid_range), sigmoid_range)
     return 1.0 / (1.0 + np.exp(-x))
 
 
+# apply anchors to the raw prediction in a single pass over memory
+# pred: raw prediction of the model (y, x, anchor, data)
+# anchor_wh: width and height of anchor boxes (anchor, wh)
+# out: bounding boxes (y * x * anchor, data)
+@njit(parallel=True, fastmath=True, cache=True)
+def apply_anchors_ver1(
+    pred: np.ndarray,
+    anchor_wh: np.ndarray,
+    xyscale: float,
+    stride: int,
+    out: np.ndarray
+) -> None:
+    height, width, num_anchors, num_data = pred.shape
+    xyshift = 0.5 * (xyscale - 1)
+    for i in prange(height):
+        for j in range(width):
+            for a in range(num_anchors):
+                k = (i * width + j) * num_anchors + a
+                # xy: center x, center y
+                out[k, 0] = (
+                    sigmoid(pred[i, j, a, 0]) * xyscale - xyshift + j
+                ) * stride
+                out[k, 1] = (
+                    sigmoid(pred[i, j, a, 1]) * xyscale - xyshift + i
+                ) * stride
+                # wh: width, height
+                out[k, 2] = np.exp(pred[i, j, a, 2]) * anchor_wh[a, 0]
+                out[k, 3] = np.exp(pred[i, j, a, 3]) * anchor_wh[a, 1]
+                # conf: confidence score of the bounding box
+                # prob: probability for each category
+                for c in range(4, num_data):
+                    out[k, c] = sigmoid(pred[i, j, a, c])
+    return
+
+
+# same as apply_anchors_ver1 except for width and height (Scaled-YOLOv4)
+@njit(parallel=True, fastmath=True, cache=True)
+def apply_anchors_ver2(
+    pred: np.ndarray,
+    anchor_wh: np.ndarray,
+    xyscale: float,
+    stride: int,
+    out: np.ndarray
+) -> None:
+    height, width, num_anchors, num_data = pred.shape
+    xyshift = 0.5 * (xyscale - 1)
+    for i in prange(height):
+        for j in range(width):
+            for a in range(num_anchors):
+                k = (i * width + j) * num_anchors + a
+                # xy: center x, center y
+                out[k, 0] = (
+                    sigmoid(pred[i, j, a, 0]) * xyscale - xyshift + j
+                ) * stride
+                out[k, 1] = (
+                    sigmoid(pred[i, j, a, 1]) * xyscale - xyshift + i
+                ) * stride
+                # wh: width, height
+                out[k, 2] = (
+                    (sigmoid(pred[i, j, a, 2]) * xyscale) ** 2
+                ) * anchor_wh[a, 0]
+                out[k, 3] = (
+                    (sigmoid(pred[i, j, a, 3]) * xyscale) ** 2
+                ) * anchor_wh[a, 1]
+                # conf: confidence score of the bounding box
+                # prob: probability for each category
+                for c in range(4, num_data):
+                    out[k, c] = sigmoid(pred[i, j, a, c])
+    return
+
+
 class YoloTFOnnx(Framework):
     def __init__(self: YoloTFOnnx, config: Config) -> None:
         super().__init__(config=config)
-        path_model = f'{path_wt}/tf_{config.model}.onnx'
+        from utils.onnx_session import create_onnx_session, bind_onnx_outputs
+        if config.quantize == 'int8':
+            path_model = f'{path_wt}/tf_{config.model}.quant.onnx'
+        else:
+            path_model = f'{path_wt}/tf_{config.model}.onnx'
         if not os.path.isfile(path_model):
             raise SystemError(f'onnx({path_model}) not found')
-        self.sess = rt.InferenceSession(path_model)
+        self.sess = create_onnx_session(path_model)
         input_blob = [x.name for x in self.sess.get_inputs()]
         assert len(input_blob) == 1 and input_blob[0] == 'x:0'
         self.input_name = input_blob[0]
         input_shape = self.sess.get_inputs()[0].shape
-        assert input_shape[2] == IMAGE_SIZES[self.config.model]
-        assert input_shape[3] == IMAGE_SIZES[self.config.model]
+        self.check_batch_size(input_shape[0])
+        image_size = IMAGE_SIZES[self.config.model]
+        assert input_shape[2] == image_size
+        assert input_shape[3] == image_size
         self.output_blob = [x.name for x in self.sess.get_outputs()]
+        self.binding, self.output_buffers = bind_onnx_outputs(
+            sess=self.sess,
+            output_names=self.output_blob,
+            input_feed={self.input_name: np.zeros(
+                (config.batch_size, 3, image_size, image_size),
+                dtype=np.float32
+            )}
+        )
         return
 
-    def inference(self: YoloTFOnnx, sess: Session) -> List[np.ndarray]:
-        preds = self.sess.run(
-            output_names=self.output_blob,
-            input_feed=sess.yolo_input
+    def inference(
+        self: YoloTFOnnx,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        self.binding.bind_cpu_input(
+            self.input_name, input_feed[self.input_name]
         )
-        preds = [np.squeeze(x, 0).copy() for x in preds]
-        return preds
+        self.sess.run_with_iobinding(self.binding)
+        return self.output_buffers
 
 
 class YoloTFLite(Framework):
     def __init__(self: YoloTFLite, config: Config) -> None:
         super().__init__(config=config)
+        import tensorflow as tf
         path_model = f'{path_wt}/{config.model}_{config.quantize}.tflite'
         if not os.path.isfile(path_model):
             raise SystemError(f'tflite({path_model}) not found')
         self.interpreter = tf.lite.Interpreter(path_model)
-        self.interpreter.allocate_tensors()
         input_details = self.interpreter.get_input_details()
         input_shape = input_details[0]['shape']
         assert input_shape[1] == IMAGE_SIZES[self.config.model]
         assert input_shape[2] == IMAGE_SIZES[self.config.model]
         self.input_name = 'images'
         self.input_index = input_details[0]['index']
+        if input_shape[0] != config.batch_size:
+            input_shape[0] = config.batch_size
+            self.interpreter.resize_tensor_input(
+                self.input_index, input_shape
+            )
+        self.interpreter.allocate_tensors()
         output_details = self.interpreter.get_output_details()
         self.output_indexes = [
             x['index'] for x in output_details
         ]
         if config.quantize == 'int8':
             self.output_quant_params = [
-                x['quantization_parameters'] for x in output_details
+                (
+                    np.float32(x['quantization_parameters']['zero_points'][0]),
+                    np.float32(x['quantization_parameters']['scales'][0])
+                ) for x in output_details
+            ]
+            # dequantized outputs are written into these buffers
+            self.output_buffers = [
+                np.empty(x['shape'], dtype=np.float32)
+                for x in output_details
             ]
         return
 
-    def inference(self: YoloTFLite, sess: Session) -> List[np.ndarray]:
+    def inference(
+        self: YoloTFLite,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
         self.interpreter.set_tensor(
             self.input_index,
-            sess.yolo_input[self.input_name]
+            input_feed[self.input_name]
         )
         self.interpreter.invoke()
         if self.config.quantize == 'int8':
-            preds = list()
-            for index, params in zip(
-                self.output_indexes, self.output_quant_params
+            for index, (zero_point, scale), out in zip(
+                self.output_indexes,
+                self.output_quant_params,
+                self.output_buffers
             ):
-                raw = self.interpreter.get_tensor(index)
-                out = (
-                    raw.astype(np.float32) - params['zero_points']
-                ) * params['scales']
-                preds.append(out)
+                # view of the internal buffer of the interpreter (no copy)
+                raw = self.interpreter.tensor(index)()
+                np.subtract(raw, zero_point, out=out, dtype=np.float32)
+                out *= scale
+            preds = self.output_buffers
         else:
             preds = [
                 self.interpreter.get_tensor(x)
                 for x in self.output_indexes
             ]
-        preds = [np.squeeze(x, 0).copy() for x in preds]
         return preds
 
 
 class YoloTF(Framework):
     def __init__(self: YoloTF, config: Config) -> None:
         super().__init__(config=config)
+        import tensorflow as tf
+        from utils.convert_tflite import load_frozen_graph
         path_pb = f'{path_wt}/{config.model}.pb'
         if not os.path.isfile(path_pb):
             raise SystemError(f'pb({path_pb}) not found')
@@ -164,36 +268,53 @@ class YoloTF(Framework):
             inputs=inputs,
             outputs=outputs
         )
+        # the batch size is fixed when the graph is frozen
+        self.check_batch_size(self.model.inputs[0].shape[0])
         self.input_name = 'images'
+        self.convert_to_tensor = tf.convert_to_tensor
         return
 
-    def inference(self: YoloTF, sess: Session) -> List[np.ndarray]:
-        preds = self.model(tf.convert_to_tensor(
-            sess.yolo_input[self.input_name]
+    def inference(
+        self: YoloTF,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        preds = self.model(self.convert_to_tensor(
+            input_feed[self.input_name]
         ))
-        preds = [tf.squeeze(x).numpy() for x in preds]
+        preds = [x.numpy() for x in preds]
         return preds
 
 
 class YoloOnnxTF(Framework):
     def __init__(self: YoloOnnxTF, config: Config) -> None:
         super().__init__(config=config)
+        import tensorflow as tf
+        from models.tf_yolov5 import WrapperYoloV5
         path_weight = f'{path_wt}/onnx_tf_{config.model}'
         if not os.path.isdir(path_weight):
             raise SystemError(f'weight({path_weight}) not found')
         model_sm = tf.keras.models.load_model(path_weight)
+        # the batch size is fixed when the model is exported to ONNX
+        signature = model_sm.signatures['serving_default']
+        input_spec = list(signature.structured_input_signature[1].values())
+        self.check_batch_size(input_spec[0].shape[0])
         self.model = WrapperYoloV5(yolov5=model_sm)
         self.input_name = 'images'
         return
 
-    def inference(self: YoloOnnxTF, sess: Session) -> List[np.ndarray]:
-        pred = self.model(sess.yolov5_input[self.input_name])
-        return np.squeeze(pred[0].numpy(), 0).copy()
+    def inference(
+        self: YoloOnnxTF,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        pred = self.model(input_feed[self.input_name])
+        return pred[0].numpy()
 
 
 class YoloVino(Framework):
     def __init__(self: YoloVino, config: Config) -> None:
         super().__init__(config=config)
+        from openvino.inference_engine import IECore
+        from utils.vino_config import create_vino_config
         model = config.model
         if not os.path.isdir(f'{path_wt}/onnx_vino_{model}'):
             raise ValueError(f'OpenVINO IR not found: {model}')
@@ -210,223 +331,316 @@ class YoloVino(Framework):
         output_blob = list(net.outputs.keys())
         assert 'output' in output_blob
         self.output_blob = ['output']
-        self.exec_net = ie.load_network(network=net, device_name='CPU')
+        net.batch_size = config.batch_size
+        # two requests to overlap a batch with the next one
+        self.num_requests = 2
+        self.exec_net = ie.load_network(
+            network=net,
+            device_name='CPU',
+            config=create_vino_config(),
+            num_requests=self.num_requests
+        )
+        self.start_id = 0
+        self.finish_id = 0
         return
 
-    def inference(self: YoloVino, sess: Session) -> List[np.ndarray]:
-        pred = self.exec_net.infer(inputs=sess.yolov5_input)
+    def inference(
+        self: YoloVino,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        pred = self.exec_net.infer(inputs=input_feed)
         pred = [pred[ob] for ob in self.output_blob]
-        return np.squeeze(pred[0], 0).copy()
+        return pred[0]
+
+    def start(
+        self: YoloVino,
+        input_feed: Dict[str, np.ndarray]
+    ) -> None:
+        # input tensors are copied into the request
+        self.exec_net.start_async(
+            request_id=self.start_id, inputs=input_feed
+        )
+        self.start_id = (self.start_id + 1) % self.num_requests
+        return
+
+    def finish(self: YoloVino) -> List[np.ndarray]:
+        request = self.exec_net.requests[self.finish_id]
+        wait_start = time.perf_counter()
+        request.wait()
+        waited = time.perf_counter() - wait_start
+        # latency of the request (msec) includes the part which ran
+        # before waiting for it
+        self.overlapped_time = max(request.latency / 1000 - waited, 0.0)
+        self.finish_id = (self.finish_id + 1) % self.num_requests
+        # output blobs are valid until the request is started again
+        pred = [request.output_blobs[ob].buffer for ob in self.output_blob]
+        return pred[0]
 
 
 class YoloOnnx(Framework):
     def __init__(self: YoloOnnx, config: Config) -> None:
         super().__init__(config=config)
-        path_model = f'{path_wt}/{config.model}.onnx'
+        from utils.onnx_session import create_onnx_session, bind_onnx_outputs
+        if config.quantize == 'int8':
+            path_model = f'{path_wt}/{config.model}.quant.onnx'
+        else:
+            path_model = f'{path_wt}/{config.model}.onnx'
         if not os.path.isfile(path_model):
             raise SystemError(f'onnx({path_model}) not found')
-        self.sess = rt.InferenceSession(path_model)
+        self.sess = create_onnx_session(path_model)
         input_blob = [x.name for x in self.sess.get_inputs()]
         assert len(input_blob) == 1 and input_blob[0] == 'images'
         self.input_name = input_blob[0]
         input_shape = self.sess.get_inputs()[0].shape
-        assert input_shape[2] == IMAGE_SIZES[self.config.model]
-        assert input_shape[3] == IMAGE_SIZES[self.config.model]
+        self.check_batch_size(input_shape[0])
+        image_size = IMAGE_SIZES[self.config.model]
+        assert input_shape[2] == image_size
+        assert input_shape[3] == image_size
         output_blob = [x.name for x in self.sess.get_outputs()]
         assert 'output' in output_blob
         self.output_blob = ['output']
+        self.binding, self.output_buffers = bind_onnx_outputs(
+            sess=self.sess,
+            output_names=self.output_blob,
+            input_feed={self.input_name: np.zeros(
+                (config.batch_size, 3, image_size, image_size),
+                dtype=np.float32
+            )}
+        )
         return
 
-    def inference(self: YoloOnnx, sess: Session) -> List[np.ndarray]:
-        pred = self.sess.run(
-            output_names=self.output_blob,
-            input_feed=sess.yolov5_input
+    def inference(
+        self: YoloOnnx,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        self.binding.bind_cpu_input(
+            self.input_name, input_feed[self.input_name]
         )
-        return np.squeeze(pred[0], 0).copy()
+        self.sess.run_with_iobinding(self.binding)
+        return self.output_buffers[0]
 
 
 class YoloTorch(Framework):
     def __init__(self: YoloTorch, config: Config) -> None:
         super().__init__(config=config)
+        import torch
         path_weight = f'{path_wt}/{config.model}.pt'
         if not os.path.isfile(path_weight):
             raise SystemError(f'weight({path_weight}) not found')
-        repo = 'ultralytics/yolov5'
-        model = torch.hub.load(repo, config.model, pretrained=False)
-        ckpt = torch.load(path_weight, map_location='cpu')['model']
-        model.load_state_dict(ckpt.state_dict())
-        model.names = ckpt.names
-        self.model = model.float().fuse()
-        self.model.eval()
+        torch.set_num_threads(max(os.cpu_count() // 2, 1))
+        # traced graph of the fixed batch size is cached
+        # (reused if it is newer than the weight)
+        path_ts = f'{path_wt}/{config.model}_b{config.batch_size}.ts'
+        if (
+            os.path.isfile(path_ts)
+        ) and (
+            os.path.getmtime(path_ts) >= os.path.getmtime(path_weight)
+        ):
+            self.model = torch.jit.load(path_ts, map_location='cpu')
+        else:
+            repo = 'ultralytics/yolov5'
+            model = torch.hub.load(repo, config.model, pretrained=False)
+            ckpt = torch.load(path_weight, map_location='cpu')['model']
+            model.load_state_dict(ckpt.state_dict())
+            model.names = ckpt.names
+            model = model.float().fuse()
+            model.eval()
+            # trace the model once to run it as a TorchScript graph
+            # and freeze its weights as constants
+            image_size = IMAGE_SIZES[config.model]
+            example = torch.zeros(
+                (config.batch_size, 3, image_size, image_size)
+            )
+            with torch.no_grad():
+                self.model = torch.jit.freeze(
+                    torch.jit.trace(model, example)
+                )
+            torch.jit.save(self.model, path_ts)
+        self.model = torch.jit.optimize_for_inference(self.model)
         self.input_name = 'images'
+        self.from_numpy = torch.from_numpy
+        self.no_grad = torch.no_grad
         return
 
-    def inference(self: YoloTorch, sess: Session) -> List[np.ndarray]:
-        input_feed = torch.from_numpy(
-            sess.yolov5_input[self.input_name]
-        ).to('cpu')
-        with torch.no_grad():
-            pred = self.model(input_feed, augment=True)[0]
-        return np.squeeze(pred.detach().numpy(), 0).copy()
+    def inference(
+        self: YoloTorch,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        # share the memory of the input buffer (no copy)
+        images = self.from_numpy(input_feed[self.input_name])
+        with self.no_grad():
+            pred = self.model(images)[0]
+        return pred.detach().numpy()
+
+
+# supported frameworks
+# (each class imports its libraries only when it is selected)
+FRAMEWORKS = {
+    'tf': YoloTF,
+    'tflite': YoloTFLite,
+    'tf_onnx': YoloTFOnnx,
+}
 
 
 class Yolo(Model):
     def __init__(self: Yolo, config: Config) -> None:
         super().__init__(config=config)
-        if config.framework == 'tf':
-            self.framework = YoloTF(config=config)
-        elif config.framework == 'tflite':
-            self.framework = YoloTFLite(config=config)
-        elif config.framework == 'tf_onnx':
-            self.framework = YoloTFOnnx(config=config)
-        else:
+        if config.framework not in FRAMEWORKS:
             raise SystemError(
                 f'YOLO unsupport {config.framework}'
             )
+        self.framework = FRAMEWORKS[config.framework](config=config)
+        self.prepare_input()
+        self.prepare_anchors()
+        self.prepare_kernels()
         return
 
-    def prep_image(self: Yolo, sess: Session) -> None:
+    def prepare_input(self: Yolo) -> None:
         image_size = IMAGE_SIZES[self.config.model]
-        sess.padding_image(
-            model_height=image_size, model_width=image_size
-        )
-        image = sess.pad_image
-        # reshape image to throw it to the model
-        image = image[:, :, ::-1]  # BGR -> RGB
-        if self.config.framework in [
+        # layout of the input tensor is NCHW (channel first) or NHWC
+        self.channel_first = self.config.framework in [
             'torch', 'torch_onnx', 'onnx_vino', 'onnx_tf', 'tf_onnx'
-        ]:
-            image = image.transpose((2, 0, 1))  # HWC -> CHW
-        image = image[np.newaxis, ...]
+        ]
+        if self.channel_first:
+            shape = (
+                self.config.batch_size, 3, image_size, image_size
+            )  # NCHW
+        else:
+            shape = (
+                self.config.batch_size, image_size, image_size, 3
+            )  # NHWC
         if (
             self.config.framework == 'tflite'
         ) and (
             self.config.quantize == 'int8'
         ):
-            image = image.astype(np.uint8)
+            dtype = np.uint8
         else:
-            image = image.astype(np.float32)
-            image /= 255.0
-        sess.yolo_input = {self.framework.input_name: image}
+            dtype = np.float32
+        # the buffers are reused for every other batch
+        self.input_feeds = [
+            {self.framework.input_name: np.empty(shape, dtype=dtype)}
+            for _ in range(2)
+        ]
         return
 
-    @staticmethod
-    def apply_anchors_ver1(
-        pred: np.ndarray,
-        stride: int,
-        anchor: List[Tuple[int]],
-        xyscale: float
-    ) -> np.ndarray:
-        assert len(pred.shape) == 3
-        assert pred.shape[2] == 255
-        # align the axes to (x, y, anchor, data)
-        pred = pred.reshape((*pred.shape[:2], 3, 85))
-        # calc grid of anchor box
-        anchor_grid = np.array(anchor)[np.newaxis, np.newaxis, :, :]
-        grid = np.meshgrid(
-            np.arange(pred.shape[1]), np.arange(pred.shape[0])
-        )
-        grid = np.stack(grid, axis=-1)[:, :, np.newaxis, :]
-        # xy: min_x, min_y
-        # wh: width, height
-        # conf: confidence score of the bounding box
-        # prob: probability for each category
-        xy, wh, conf, prob = np.split(
-            pred, (2, 4, 5), axis=-1
-        )
-        # apply anchor
-        xy = (
-            (sigmoid(xy) * xyscale) - (0.5 * (xyscale - 1)) + grid
-        ) * stride
-        wh = np.exp(wh) * anchor_grid
-        conf = sigmoid(conf)
-        prob = sigmoid(prob)
-        # concat
-        bbox = np.concatenate([xy, wh, conf, prob], axis=-1)
-        # expand all anchors
-        bbox = np.reshape(bbox, (-1, 85))
-        return bbox
-
-    @staticmethod
-    def apply_anchors_ver2(
-        pred: np.ndarray,
-        stride: int,
-        anchor: List[Tuple[int]],
-        xyscale: float
-    ) -> np.ndarray:
-        assert len(pred.shape) == 3
-        assert pred.shape[2] == 255
-        # align the axes to (x, y, anchor, data)
-        pred = pred.reshape((*pred.shape[:2], 3, 85))
-        # calc grid of anchor box
-        anchor_grid = np.array(anchor)[np.newaxis, np.newaxis, :, :]
-        grid = np.meshgrid(
-            np.arange(pred.shape[1]), np.arange(pred.shape[0])
+    def prep_image(self: Yolo, sess: Session, index: int) -> None:
+        image_size = IMAGE_SIZES[self.config.model]
+        sess.padding_image(
+            model_height=image_size, model_width=image_size
         )
-        grid = np.stack(grid, axis=-1)[:, :, np.newaxis, :]
-        # apply anchor
-        pred = sigmoid(pred)
-        pred[..., :2] = (
-            (pred[..., :2] * xyscale) - (0.5 * (xyscale - 1)) + grid
-        ) * stride
-        pred[..., 2:4] = ((pred[..., 2:4] * xyscale) ** 2) * anchor_grid
-        # expand all anchors
-        bbox = np.reshape(pred, (-1, 85))
-        return bbox
+        image = sess.pad_image
+        input_feed = self.input_feeds[self.input_index]
+        input_image = input_feed[self.framework.input_name]
+        # BGR -> RGB, HWC -> CHW (if needed) and normalize in one pass
+        if self.channel_first:
+            for channel in range(3):
+                np.multiply(
+                    image[:, :, 2 - channel], np.float32(1.0 / 255.0),
+                    out=input_image[index, channel], dtype=np.float32
+                )
+        elif input_image.dtype == np.uint8:
+            np.copyto(input_image[index], image[:, :, ::-1])
+        else:
+            np.multiply(
+                image[:, :, ::-1], np.float32(1.0 / 255.0),
+                out=input_image[index], dtype=np.float32
+            )
+        return
+
+    def prepare_anchors(self: Yolo) -> None:
+        self.anchor_whs = dict()
+        for stride, anchor in STRIDE_ANCHORS[self.config.model].items():
+            # width and height of anchor boxes (anchor, wh)
+            self.anchor_whs[stride] = np.array(anchor, dtype=np.float32)
+        return
+
+    def prepare_kernels(self: Yolo) -> None:
+        # compile numba kernels before the first (timed) inference
+        # with the same types of arguments
+        xyscales = STRIDE_XYSCALES[self.config.model]
+        if self.config.model in ['yolov4-csp', 'yolov4x-mish']:
+            apply_anchors_func = apply_anchors_ver2
+        else:
+            apply_anchors_func = apply_anchors_ver1
+        for stride, anchor_wh in self.anchor_whs.items():
+            apply_anchors_func(
+                np.zeros((1, 1, 3, 85), dtype=np.float32),
+                anchor_wh,
+                xyscales[stride],
+                stride,
+                np.empty((3, 85), dtype=np.float32)
+            )
+        # (two rows so that the column slices are strided as in inference)
+        pred = np.zeros((2, 85), dtype=np.float32)
+        out = np.empty((2, 6), dtype=np.float32)
+        argmax_conf(pred[:, 4:5], pred[:, 5:], 1.0, out[:, 4], out[:, 5])
+        return
 
     def apply_anchors(self: Yolo, preds: List[np.ndarray]) -> np.ndarray:
         image_size = IMAGE_SIZES[self.config.model]
-        anchors = STRIDE_ANCHORS[self.config.model]
         xyscales = STRIDE_XYSCALES[self.config.model]
+        # call each version of apply_anchors
+        if self.config.model in ['yolov4-csp', 'yolov4x-mish']:
+            apply_anchors_func = apply_anchors_ver2
+        else:
+            apply_anchors_func = apply_anchors_ver1
         applied = list()
         for pred in preds:
+            assert len(pred.shape) == 3
+            assert pred.shape[2] == 255
             stride = image_size // max(pred.shape[:2])
-            anchor = anchors[stride]
-            xyscale = xyscales[stride]
-            # call each version of apply_anchors
-            if self.config.model in ['yolov4-csp', 'yolov4x-mish']:
-                bbox = self.apply_anchors_ver2(
-                    pred=pred,
-                    stride=stride,
-                    anchor=anchor,
-                    xyscale=xyscale
-                )
-            else:
-                bbox = self.apply_anchors_ver1(
-                    pred=pred,
-                    stride=stride,
-                    anchor=anchor,
-                    xyscale=xyscale
-                )
+            # align the axes to (y, x, anchor, data)
+            pred = pred.reshape((*pred.shape[:2], 3, 85))
+            bbox = np.empty(
+                (pred.shape[0] * pred.shape[1] * 3, 85), dtype=np.float32
+            )
+            apply_anchors_func(
+                pred,
+                self.anchor_whs[stride],
+                xyscales[stride],
+                stride,
+                bbox
+            )
             applied.append(bbox)
         return np.concatenate(applied, axis=0)
 
-    def inference(self: Yolo, sess: Session) -> np.ndarray:
-        preds = super().inference(sess=sess)
+    def finish(self: Yolo, batch: List[Session]) -> List[np.ndarray]:
+        preds = super().finish(batch=batch)
+        return [
+            self.postprocess(sess=sess, preds=[x[index] for x in preds])
+            for index, sess in enumerate(batch)
+        ]
+
+    def postprocess(
+        self: Yolo,
+        sess: Session,
+        preds: List[np.ndarray]
+    ) -> np.ndarray:
         pred = self.apply_anchors(preds=preds)
         assert len(pred.shape) == 2
         assert pred.shape[1] == 85
+        # 0-3: xyxy, 4: category id, 5: confidence score
+        out = np.empty((pred.shape[0], 6), dtype=np.float32)
         # xywh -> xyxy
-        xywh = pred[:, :4]
-        xyxy = np.concatenate([
-            (xywh[:, :2] - (xywh[:, 2:] * 0.5)),
-            (xywh[:, :2] + (xywh[:, 2:] * 0.5))
-        ], axis=-1)
+        half_wh = pred[:, 2:4] * 0.5
+        np.subtract(pred[:, :2], half_wh, out=out[:, :2])
+        np.add(pred[:, :2], half_wh, out=out[:, 2:4])
         # rescale bouding boxes according to image preprocessing
-        xyxy = sess.rescale_xyxy(xyxy)
+        sess.rescale_xyxy(out[:, :4])
         # confidence score of bbox and probability for each category
         conf = pred[:, 4:5]
         prob = pred[:, 5:]
-        # confidence score for each category = conf * prob
-        cat_conf = conf * prob
-        if self.config.model == 'yolov3-tiny':
-            cat_conf = np.power(cat_conf, 0.3)
         # catgory of bouding box is the most plausible category
-        cat = cat_conf.argmax(axis=1)[:, np.newaxis].astype(np.float)
-        # confidence score of bbox is that of the most plausible category
-        conf = cat_conf.max(axis=1)[:, np.newaxis]
-        # ready for NMS (0-3: xyxy, 4: category id, 5: confidence score)
-        return np.concatenate((xyxy, cat, conf), axis=1)
+        # and confidence score of bbox is that of the category
+        # (confidence score for each category = conf * prob)
+        if self.config.model == 'yolov3-tiny':
+            power = 0.3
+        else:
+            power = 1.0
+        argmax_conf(conf, prob, power, out[:, 4], out[:, 5])
+        # ready for NMS
+        return out
 
 
 class DetectorYolo(Detector):
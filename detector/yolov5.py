@@ -1,16 +1,13 @@
 #!/usr/bin/env python
 # -*- coding:utf-8 -*-
 from __future__ import annotations
-from typing import List
+from typing import List, Dict, Optional
 from detector.base import Session, Config, Framework, Model, Detector
 import os
+import time
 import numpy as np
-import onnxruntime as rt
-import torch
-import tensorflow as tf
-from models.tf_yolov5 import WrapperYoloV5
-from openvino.inference_engine import IECore
-from utils.convert_tflite import load_frozen_graph
+from scipy.special import expit
+from utils.category import argmax_conf
 
 IMAGE_SIZE = 640
 path_wt = 'weights/yolov5'
@@ -21,110 +18,174 @@ ANCHORS = {
 }
 
 
-def sigmoid(x: np.ndarray) -> np.ndarray:
-    sigmoid_range = 34.538776394910684
-    x = np.clip(x, -sigmoid_range, sigmoid_range)
-    return 1.0 / (1.0 + np.exp(-x))
+def sigmoid(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    # expit is a fused ufunc which never overflows, so clipping is needless
+    return expit(x, out=out)
+
+
+def make_anchor_offset(stride: int) -> np.ndarray:
+    grid_size = IMAGE_SIZE // stride
+    grid = np.meshgrid(np.arange(grid_size), np.arange(grid_size))
+    # offset of each grid cell (anchor, y, x, xy)
+    grid = np.stack(grid, axis=-1)[np.newaxis, :, :, :]
+    return np.ascontiguousarray(grid, dtype=np.float32)
+
+
+# grid offsets and anchor boxes are independent of the input image
+ANCHOR_OFFSETS = {
+    stride: make_anchor_offset(stride) for stride in ANCHORS.keys()
+}
+ANCHOR_WHS = {
+    stride: np.array(anchor, dtype=np.float32).reshape((3, 1, 1, 2))
+    for stride, anchor in ANCHORS.items()
+}
 
 
 def apply_anchors(preds: List[np.ndarray]) -> np.ndarray:
-    applied = list()
+    num_bboxes = sum([pred.size // 85 for pred in preds])
+    applied = np.empty((num_bboxes, 85), dtype=np.float32)
+    start = 0
     for pred in preds:
         stride = IMAGE_SIZE // max(pred.shape[1:3])
-        anchor = np.array(ANCHORS[stride])
-        anchor_grid = np.reshape(anchor, (3, 1, 1, 2))
-        grid = np.meshgrid(
-            np.arange(pred.shape[2]), np.arange(pred.shape[1])
-        )
-        grid = np.stack(grid, axis=-1)[np.newaxis, :, :, :]
-        pred = sigmoid(pred)
-        pred[..., :2] = ((pred[..., :2] * 2) - 0.5 + grid) * stride
-        pred[..., 2:4] = ((pred[..., 2:4] * 2) ** 2) * anchor_grid
-        applied.append(np.reshape(pred, (-1, 85)))
-    return np.concatenate(applied, axis=0)
+        end = start + pred.size // 85
+        # write into the output buffer directly (anchor, y, x, data)
+        bbox = np.reshape(applied[start:end], pred.shape)
+        sigmoid(pred, out=bbox)
+        # xy: grid offsets (1, y, x, xy) are broadcasted over anchors
+        xy = bbox[..., :2]
+        xy *= 2
+        xy -= 0.5
+        xy += ANCHOR_OFFSETS[stride]
+        xy *= stride
+        # wh: anchor boxes (anchor, 1, 1, wh) are broadcasted over grids
+        wh = bbox[..., 2:4]
+        wh *= 2
+        np.square(wh, out=wh)
+        wh *= ANCHOR_WHS[stride]
+        start = end
+    return applied
 
 
 class YoloV5TFOnnx(Framework):
     def __init__(self: YoloV5TFOnnx, config: Config) -> None:
         super().__init__(config=config)
-        path_model = f'{path_wt}/tf_{config.model}.onnx'
+        from utils.onnx_session import create_onnx_session, bind_onnx_outputs
+        if config.quantize == 'int8':
+            path_model = f'{path_wt}/tf_{config.model}.quant.onnx'
+        else:
+            path_model = f'{path_wt}/tf_{config.model}.onnx'
         if not os.path.isfile(path_model):
             raise SystemError(f'onnx({path_model}) not found')
-        self.sess = rt.InferenceSession(path_model)
+        self.sess = create_onnx_session(path_model)
         input_blob = [x.name for x in self.sess.get_inputs()]
         assert len(input_blob) == 1 and input_blob[0] == 'x:0'
         self.input_name = input_blob[0]
         input_shape = self.sess.get_inputs()[0].shape
+        self.check_batch_size(input_shape[0])
         assert input_shape[2] == IMAGE_SIZE
         assert input_shape[3] == IMAGE_SIZE
         output_blob = [x.name for x in self.sess.get_outputs()]
         assert 'Identity:0' in output_blob
         self.output_blob = ['Identity:0']
+        self.binding, self.output_buffers = bind_onnx_outputs(
+            sess=self.sess,
+            output_names=self.output_blob,
+            input_feed={self.input_name: np.zeros(
+                (config.batch_size, 3, IMAGE_SIZE, IMAGE_SIZE),
+                dtype=np.float32
+            )}
+        )
+        self.raw_output = False
         return
 
-    def inference(self: YoloV5TFOnnx, sess: Session) -> np.ndarray:
-        pred = self.sess.run(
-            output_names=self.output_blob,
-            input_feed=sess.yolov5_input
+    def inference(
+        self: YoloV5TFOnnx,
+        input_feed: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        self.binding.bind_cpu_input(
+            self.input_name, input_feed[self.input_name]
         )
-        pred = np.squeeze(pred[0], 0).copy()
-        pred[:, :4] = pred[:, :4] * IMAGE_SIZE
+        self.sess.run_with_iobinding(self.binding)
+        # the buffer is overwritten at the next run, so scale it in place
+        pred = self.output_buffers[0]
+        pred[..., :4] *= IMAGE_SIZE
         return pred
 
 
 class YoloV5TFLite(Framework):
     def __init__(self: YoloV5TFLite, config: Config) -> None:
         super().__init__(config=config)
+        import tensorflow as tf
         path_model = f'{path_wt}/{config.model}_{config.quantize}.tflite'
         if not os.path.isfile(path_model):
             raise SystemError(f'tflite({path_model}) not found')
         self.interpreter = tf.lite.Interpreter(path_model)
-        self.interpreter.allocate_tensors()
         input_details = self.interpreter.get_input_details()
         input_shape = input_details[0]['shape']
         assert input_shape[1] == IMAGE_SIZE
         assert input_shape[2] == IMAGE_SIZE
         self.input_name = 'images'
         self.input_index = input_details[0]['index']
+        if input_shape[0] != config.batch_size:
+            input_shape[0] = config.batch_size
+            self.interpreter.resize_tensor_input(
+                self.input_index, input_shape
+            )
+        self.interpreter.allocate_tensors()
         output_details = self.interpreter.get_output_details()
         self.output_indexes = [
             x['index'] for x in output_details
         ]
         if config.quantize == 'int8':
             self.output_quant_params = [
-                x['quantization_parameters'] for x in output_details
+                (
+                    np.float32(x['quantization_parameters']['zero_points'][0]),
+                    np.float32(x['quantization_parameters']['scales'][0])
+                ) for x in output_details
+            ]
+            # dequantized outputs are written into these buffers
+            self.output_buffers = [
+                np.empty(x['shape'], dtype=np.float32)
+                for x in output_details
             ]
+        self.raw_output = False
         return
 
-    def inference(self: YoloV5TFLite, sess: Session) -> np.ndarray:
+    def inference(
+        self: YoloV5TFLite,
+        input_feed: Dict[str, np.ndarray]
+    ) -> np.ndarray:
         self.interpreter.set_tensor(
             self.input_index,
-            sess.yolov5_input[self.input_name]
+            input_feed[self.input_name]
         )
         self.interpreter.invoke()
         if self.config.quantize == 'int8':
-            pred = list()
-            for index, params in zip(
-                self.output_indexes, self.output_quant_params
+            for index, (zero_point, scale), out in zip(
+                self.output_indexes,
+                self.output_quant_params,
+                self.output_buffers
             ):
-                raw = self.interpreter.get_tensor(index)
-                out = (
-                    raw.astype(np.float32) - params['zero_points']
-                ) * params['scales']
-                pred.append(out)
+                # view of the internal buffer of the interpreter (no copy)
+                raw = self.interpreter.tensor(index)()
+                np.subtract(raw, zero_point, out=out, dtype=np.float32)
+                out *= scale
+            pred = self.output_buffers
         else:
             pred = [
                 self.interpreter.get_tensor(x)
                 for x in self.output_indexes
             ]
-        pred = np.squeeze(pred[0], 0).copy()
-        pred[:, :4] = pred[:, :4] * IMAGE_SIZE
+        pred = pred[0]
+        pred[..., :4] *= IMAGE_SIZE
         return pred
 
 
 class YoloV5TF(Framework):
     def __init__(self: YoloV5TF, config: Config) -> None:
         super().__init__(config=config)
+        import tensorflow as tf
+        from utils.convert_tflite import load_frozen_graph
         path_pb = f'{path_wt}/{config.model}.pb'
         if not os.path.isfile(path_pb):
             raise SystemError(f'pb({path_pb}) not found')
@@ -133,38 +194,58 @@ class YoloV5TF(Framework):
             inputs=['x:0'],
             outputs=['Identity:0']
         )
+        # the batch size is fixed when the graph is frozen
+        self.check_batch_size(self.model.inputs[0].shape[0])
         self.input_name = 'images'
+        self.convert_to_tensor = tf.convert_to_tensor
+        self.raw_output = False
         return
 
-    def inference(self: YoloV5TF, sess: Session) -> np.ndarray:
-        pred = self.model(tf.convert_to_tensor(
-            sess.yolov5_input[self.input_name]
+    def inference(
+        self: YoloV5TF,
+        input_feed: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        pred = self.model(self.convert_to_tensor(
+            input_feed[self.input_name]
         ))
-        pred = tf.squeeze(pred[0]).numpy()
-        pred[:, :4] = pred[:, :4] * IMAGE_SIZE
+        pred = pred[0].numpy()
+        pred[..., :4] = pred[..., :4] * IMAGE_SIZE
         return pred
 
 
 class YoloV5OnnxTF(Framework):
     def __init__(self: YoloV5OnnxTF, config: Config) -> None:
         super().__init__(config=config)
+        import tensorflow as tf
+        from models.tf_yolov5 import WrapperYoloV5
         path_weight = f'{path_wt}/onnx_tf_{config.model}'
         if not os.path.isdir(path_weight):
             raise SystemError(f'weight({path_weight}) not found')
         model_sm = tf.keras.models.load_model(path_weight)
+        # the batch size is fixed when the model is exported to ONNX
+        signature = model_sm.signatures['serving_default']
+        input_spec = list(signature.structured_input_signature[1].values())
+        self.check_batch_size(input_spec[0].shape[0])
         self.model = WrapperYoloV5(yolov5=model_sm)
         self.input_name = 'images'
+        # outputs of the detection layers (anchors are not applied)
+        self.raw_output = True
         return
 
-    def inference(self: YoloV5OnnxTF, sess: Session) -> np.ndarray:
-        preds = self.model(sess.yolov5_input[self.input_name])
-        preds = [np.squeeze(x.numpy(), 0).copy() for x in preds]
-        return apply_anchors(preds=preds)
+    def inference(
+        self: YoloV5OnnxTF,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        preds = self.model(input_feed[self.input_name])
+        preds = [x.numpy() for x in preds]
+        return preds
 
 
 class YoloV5Vino(Framework):
     def __init__(self: YoloV5Vino, config: Config) -> None:
         super().__init__(config=config)
+        from openvino.inference_engine import IECore
+        from utils.vino_config import create_vino_config
         model = config.model
         if not os.path.isdir(f'{path_wt}/onnx_vino_{model}'):
             raise ValueError(f'OpenVINO IR not found: {model}')
@@ -179,139 +260,290 @@ class YoloV5Vino(Framework):
         assert input_shape[2] == IMAGE_SIZE
         assert input_shape[3] == IMAGE_SIZE
         self.output_blob = list(net.outputs.keys())
-        self.exec_net = ie.load_network(network=net, device_name='CPU')
+        net.batch_size = config.batch_size
+        # two requests to overlap a batch with the next one
+        self.num_requests = 2
+        self.exec_net = ie.load_network(
+            network=net,
+            device_name='CPU',
+            config=create_vino_config(),
+            num_requests=self.num_requests
+        )
+        self.start_id = 0
+        self.finish_id = 0
+        # outputs of the detection layers (anchors are not applied)
+        self.raw_output = True
         return
 
-    def inference(self: YoloV5Vino, sess: Session) -> np.ndarray:
-        preds = self.exec_net.infer(inputs=sess.yolov5_input)
-        preds = [
-            np.squeeze(preds[ob], 0).copy() for ob in self.output_blob
-        ]
-        return apply_anchors(preds=preds)
+    def inference(
+        self: YoloV5Vino,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        preds = self.exec_net.infer(inputs=input_feed)
+        preds = [preds[ob] for ob in self.output_blob]
+        return preds
+
+    def start(
+        self: YoloV5Vino,
+        input_feed: Dict[str, np.ndarray]
+    ) -> None:
+        # input tensors are copied into the request
+        self.exec_net.start_async(
+            request_id=self.start_id, inputs=input_feed
+        )
+        self.start_id = (self.start_id + 1) % self.num_requests
+        return
+
+    def finish(self: YoloV5Vino) -> List[np.ndarray]:
+        request = self.exec_net.requests[self.finish_id]
+        wait_start = time.perf_counter()
+        request.wait()
+        waited = time.perf_counter() - wait_start
+        # latency of the request (msec) includes the part which ran
+        # before waiting for it
+        self.overlapped_time = max(request.latency / 1000 - waited, 0.0)
+        self.finish_id = (self.finish_id + 1) % self.num_requests
+        # output blobs are valid until the request is started again
+        preds = [request.output_blobs[ob].buffer for ob in self.output_blob]
+        return preds
 
 
 class YoloV5Onnx(Framework):
     def __init__(self: YoloV5Onnx, config: Config) -> None:
         super().__init__(config=config)
-        path_model = f'{path_wt}/{config.model}.onnx'
+        from utils.onnx_session import create_onnx_session, bind_onnx_outputs
+        if config.quantize == 'int8':
+            path_model = f'{path_wt}/{config.model}.quant.onnx'
+        else:
+            path_model = f'{path_wt}/{config.model}.onnx'
         if not os.path.isfile(path_model):
             raise SystemError(f'onnx({path_model}) not found')
-        self.sess = rt.InferenceSession(path_model)
+        self.sess = create_onnx_session(path_model)
         input_blob = [x.name for x in self.sess.get_inputs()]
         assert len(input_blob) == 1 and input_blob[0] == 'images'
         self.input_name = input_blob[0]
         input_shape = self.sess.get_inputs()[0].shape
+        self.check_batch_size(input_shape[0])
         assert input_shape[2] == IMAGE_SIZE
         assert input_shape[3] == IMAGE_SIZE
         self.output_blob = [x.name for x in self.sess.get_outputs()]
+        self.binding, self.output_buffers = bind_onnx_outputs(
+            sess=self.sess,
+            output_names=self.output_blob,
+            input_feed={self.input_name: np.zeros(
+                (config.batch_size, 3, IMAGE_SIZE, IMAGE_SIZE),
+                dtype=np.float32
+            )}
+        )
+        # outputs of the detection layers (anchors are not applied)
+        self.raw_output = True
         return
 
-    def inference(self: YoloV5Onnx, sess: Session) -> np.ndarray:
-        preds = self.sess.run(
-            output_names=self.output_blob,
-            input_feed=sess.yolov5_input
+    def inference(
+        self: YoloV5Onnx,
+        input_feed: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        self.binding.bind_cpu_input(
+            self.input_name, input_feed[self.input_name]
         )
-        preds = [np.squeeze(x, 0).copy() for x in preds]
-        return apply_anchors(preds=preds)
+        self.sess.run_with_iobinding(self.binding)
+        preds = self.output_buffers
+        return preds
 
 
 class YoloV5Torch(Framework):
     def __init__(self: YoloV5Torch, config: Config) -> None:
         super().__init__(config=config)
+        import torch
         path_torch = f'{path_wt}/{config.model}.pth'
         if not os.path.isfile(path_torch):
             raise SystemError(f'weight({path_torch}) not found')
-        repo = 'ultralytics/yolov5:v4.0'
-        model = torch.hub.load(repo, config.model, pretrained=False)
-        model.load_state_dict(torch.load(path_torch, map_location='cpu'))
-        self.model = model.fuse()
-        self.model.eval()
+        torch.set_num_threads(max(os.cpu_count() // 2, 1))
+        # traced graph of the fixed batch size is cached
+        # (reused if it is newer than the weight)
+        path_ts = f'{path_wt}/{config.model}_b{config.batch_size}.ts'
+        if (
+            os.path.isfile(path_ts)
+        ) and (
+            os.path.getmtime(path_ts) >= os.path.getmtime(path_torch)
+        ):
+            self.model = torch.jit.load(path_ts, map_location='cpu')
+        else:
+            repo = 'ultralytics/yolov5:v4.0'
+            model = torch.hub.load(repo, config.model, pretrained=False)
+            model.load_state_dict(
+                torch.load(path_torch, map_location='cpu')
+            )
+            model = model.fuse()
+            model.eval()
+            # trace the model once to run it as a TorchScript graph
+            # and freeze its weights as constants
+            example = torch.zeros(
+                (config.batch_size, 3, IMAGE_SIZE, IMAGE_SIZE)
+            )
+            with torch.no_grad():
+                self.model = torch.jit.freeze(
+                    torch.jit.trace(model, example)
+                )
+            torch.jit.save(self.model, path_ts)
+        self.model = torch.jit.optimize_for_inference(self.model)
         self.input_name = 'images'
+        self.from_numpy = torch.from_numpy
+        self.no_grad = torch.no_grad
+        self.raw_output = False
         return
 
-    def inference(self: YoloV5Torch, sess: Session) -> np.ndarray:
-        input_feed = torch.from_numpy(
-            sess.yolov5_input[self.input_name]
-        ).to('cpu')
-        with torch.no_grad():
-            pred = self.model(input_feed)[0]
-        return np.squeeze(pred.detach().numpy(), 0).copy()
+    def inference(
+        self: YoloV5Torch,
+        input_feed: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        # share the memory of the input buffer (no copy)
+        images = self.from_numpy(input_feed[self.input_name])
+        with self.no_grad():
+            pred = self.model(images)[0]
+        return pred.detach().numpy()
+
+
+# supported frameworks
+# (each class imports its libraries only when it is selected)
+FRAMEWORKS = {
+    'torch': YoloV5Torch,
+    'torch_onnx': YoloV5Onnx,
+    'onnx_vino': YoloV5Vino,
+    'onnx_tf': YoloV5OnnxTF,
+    'tf': YoloV5TF,
+    'tflite': YoloV5TFLite,
+    'tf_onnx': YoloV5TFOnnx,
+}
 
 
 class YoloV5(Model):
     def __init__(self: YoloV5, config: Config) -> None:
         super().__init__(config=config)
-        if config.framework == 'torch':
-            self.framework = YoloV5Torch(config=config)
-        elif config.framework == 'torch_onnx':
-            self.framework = YoloV5Onnx(config=config)
-        elif config.framework == 'onnx_vino':
-            self.framework = YoloV5Vino(config=config)
-        elif config.framework == 'onnx_tf':
-            self.framework = YoloV5OnnxTF(config=config)
-        elif config.framework == 'tf':
-            self.framework = YoloV5TF(config=config)
-        elif config.framework == 'tflite':
-            self.framework = YoloV5TFLite(config=config)
-        elif config.framework == 'tf_onnx':
-            self.framework = YoloV5TFOnnx(config=config)
-        else:
+        if (
+            config.framework == 'torch'
+        ) and (
+            config.prefer_openvino
+        ) and (
+            os.path.isdir(f'{path_wt}/onnx_vino_{config.model}')
+        ):
+            import cpuinfo
+            vendor = cpuinfo.get_cpu_info().get('vendor_id_raw')
+            if vendor == 'GenuineIntel':
+                # same weights run much faster on OpenVINO IR (Intel CPU)
+                print('WARNING: use onnx_vino instead of torch')
+                config.framework = 'onnx_vino'
+        if config.framework not in FRAMEWORKS:
             raise SystemError(
                 f'YOLO V5 unsupport {config.framework}'
             )
+        self.framework = FRAMEWORKS[config.framework](config=config)
+        self.prepare_input()
+        self.prepare_kernels()
         return
 
-    def prep_image(self: YoloV5, sess: Session) -> None:
-        sess.padding_image(
-            model_height=IMAGE_SIZE, model_width=IMAGE_SIZE
-        )
-        image = sess.pad_image
-        # reshape image to throw it to the model
-        image = image[:, :, ::-1]  # BGR -> RGB
-        if self.config.framework in [
+    def prepare_input(self: YoloV5) -> None:
+        # layout of the input tensor is NCHW (channel first) or NHWC
+        self.channel_first = self.config.framework in [
             'torch', 'torch_onnx', 'onnx_vino', 'onnx_tf', 'tf_onnx'
-        ]:
-            image = image.transpose((2, 0, 1))  # HWC -> CHW
-        image = image[np.newaxis, ...]
+        ]
+        if self.channel_first:
+            shape = (
+                self.config.batch_size, 3, IMAGE_SIZE, IMAGE_SIZE
+            )  # NCHW
+        else:
+            shape = (
+                self.config.batch_size, IMAGE_SIZE, IMAGE_SIZE, 3
+            )  # NHWC
         if (
             self.config.framework == 'tflite'
         ) and (
             self.config.quantize == 'int8'
         ):
-            image = image.astype(np.uint8)
+            dtype = np.uint8
         else:
-            image = image.astype(np.float32)
-            image /= 255.0
-        sess.yolov5_input = {self.framework.input_name: image}
+            dtype = np.float32
+        # the buffers are reused for every other batch
+        self.input_feeds = [
+            {self.framework.input_name: np.empty(shape, dtype=dtype)}
+            for _ in range(2)
+        ]
+        return
+
+    def prepare_kernels(self: YoloV5) -> None:
+        # compile numba kernels before the first (timed) inference
+        # with the same types of arguments
+        # (two rows so that the column slices are strided as in inference)
+        pred = np.zeros((2, 85), dtype=np.float32)
+        out = np.empty((2, 6), dtype=np.float32)
+        argmax_conf(pred[:, 4:5], pred[:, 5:], 1.0, out[:, 4], out[:, 5])
+        return
+
+    def prep_image(self: YoloV5, sess: Session, index: int) -> None:
+        sess.padding_image(
+            model_height=IMAGE_SIZE, model_width=IMAGE_SIZE
+        )
+        image = sess.pad_image
+        input_feed = self.input_feeds[self.input_index]
+        input_image = input_feed[self.framework.input_name]
+        # BGR -> RGB, HWC -> CHW (if needed) and normalize in one pass
+        if self.channel_first:
+            for channel in range(3):
+                np.multiply(
+                    image[:, :, 2 - channel], np.float32(1.0 / 255.0),
+                    out=input_image[index, channel], dtype=np.float32
+                )
+        elif input_image.dtype == np.uint8:
+            np.copyto(input_image[index], image[:, :, ::-1])
+        else:
+            np.multiply(
+                image[:, :, ::-1], np.float32(1.0 / 255.0),
+                out=input_image[index], dtype=np.float32
+            )
         return
 
-    def inference(self: YoloV5, sess: Session) -> np.ndarray:
-        pred = super().inference(sess=sess)
+    def finish(self: YoloV5, batch: List[Session]) -> List[np.ndarray]:
+        preds = super().finish(batch=batch)
+        results = list()
+        # only the images of the batch (the last batch may be short)
+        for index, sess in enumerate(batch):
+            if self.framework.raw_output:
+                pred = apply_anchors(preds=[x[index] for x in preds])
+            else:
+                pred = preds[index]
+            results.append(self.postprocess(sess=sess, pred=pred))
+        return results
+
+    def postprocess(
+        self: YoloV5,
+        sess: Session,
+        pred: np.ndarray
+    ) -> np.ndarray:
         assert len(pred.shape) == 2
         assert pred.shape[1] == 85
+        # 0-3: xyxy, 4: category id, 5: confidence score
+        out = np.empty((pred.shape[0], 6), dtype=np.float32)
         # xywh -> xyxy
-        xywh = pred[:, :4]
-        xyxy = np.concatenate([
-            (xywh[:, :2] - (xywh[:, 2:] * 0.5)),
-            (xywh[:, :2] + (xywh[:, 2:] * 0.5))
-        ], axis=-1)
+        half_wh = pred[:, 2:4] * 0.5
+        np.subtract(pred[:, :2], half_wh, out=out[:, :2])
+        np.add(pred[:, :2], half_wh, out=out[:, 2:4])
         # rescale bouding boxes according to image preprocessing
-        xyxy = sess.rescale_xyxy(xyxy)
+        sess.rescale_xyxy(out[:, :4])
         # confidence score of bbox and probability for each category
         conf = pred[:, 4:5]
         prob = pred[:, 5:]
-        # confidence score for each category = conf * prob
-        cat_conf = conf * prob
         # catgory of bouding box is the most plausible category
-        cat = cat_conf.argmax(axis=1)[:, np.newaxis].astype(np.float)
-        # confidence score of bbox is that of the most plausible category
-        conf = cat_conf.max(axis=1)[:, np.newaxis]
-        # ready for NMS (0-3: xyxy, 4: category id, 5: confidence score)
-        return np.concatenate((xyxy, cat, conf), axis=1)
+        # and confidence score of bbox is that of the category
+        # (confidence score for each category = conf * prob)
+        argmax_conf(conf, prob, 1.0, out[:, 4], out[:, 5])
+        # ready for NMS
+        return out
 
 
 class DetectorYoloV5(Detector):
     def __init__(self: DetectorYoloV5, config: Config) -> None:
+        # the model may replace the framework in config
+        model = YoloV5(config=config)
         super().__init__(config=config)
-        self.model = YoloV5(config=config)
+        self.model = model
         return
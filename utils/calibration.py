@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+from typing import List
+import cv2
+import numpy as np
+
+NUM_TRAINING_IMAGES = 100
+
+
+# input image of post-training quantization
+# (shared by TensorFlow Lite and ONNX Runtime to calibrate alike)
+# imgsize: height and width of the model input
+# channel_first: NCHW if True else NHWC
+def load_calibration_image(
+    path: str,
+    imgsize: List[int],
+    channel_first: bool = False
+) -> np.ndarray:
+    img = cv2.imread(path)
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    ih = img.shape[0]
+    iw = img.shape[1]
+    scale = min(imgsize[0] / ih, imgsize[1] / iw)
+    nh = int(ih * scale)
+    nw = int(iw * scale)
+    oh = (imgsize[0] - nh) // 2
+    ow = (imgsize[1] - nw) // 2
+    if scale >= 1:
+        interpolation = cv2.INTER_CUBIC
+    else:
+        interpolation = cv2.INTER_AREA
+    nimg = cv2.resize(img, (nw, nh), interpolation=interpolation)
+    rimg = np.full((*imgsize, 3), 128, dtype=np.uint8)
+    rimg[oh:oh + nh, ow:ow + nw, :] = nimg
+    if channel_first:
+        rimg = rimg.transpose((2, 0, 1))
+    rimg = rimg[np.newaxis, ...].astype(np.float32)
+    rimg /= 255.0
+    return rimg
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import numpy as np
+from numba import njit, prange
+
+
+# the most plausible category of each bounding box and its confidence score
+# (argmax and max of conf * prob in a single pass)
+# conf: confidence score of bounding boxes (bbox, 1)
+# prob: probability for each category (bbox, category)
+# power: exponent applied to the confidence score (1.0: as it is)
+# out_cat, out_conf: category id and confidence score (bbox,)
+@njit(parallel=True, fastmath=True, cache=True)
+def argmax_conf(
+    conf: np.ndarray,
+    prob: np.ndarray,
+    power: float,
+    out_cat: np.ndarray,
+    out_conf: np.ndarray
+) -> None:
+    num_bboxes, num_categories = prob.shape
+    for i in prange(num_bboxes):
+        c = conf[i, 0]
+        best = -1.0
+        best_j = 0
+        for j in range(num_categories):
+            v = c * prob[i, j]
+            if v > best:
+                best = v
+                best_j = j
+        out_cat[i] = best_j
+        # power is monotonic, so it does not change the category
+        if power != 1.0:
+            best = best ** power
+        out_conf[i] = best
+    return
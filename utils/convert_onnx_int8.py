@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+from __future__ import annotations
+from typing import List, Dict, Optional
+import os
+import glob
+import numpy as np
+import onnx
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+from utils.calibration import NUM_TRAINING_IMAGES, load_calibration_image
+
+
+class CalibrationDataset(CalibrationDataReader):
+    def __init__(
+        self: CalibrationDataset,
+        input_name: str,
+        imgsize: List[int]
+    ) -> None:
+        self.input_name = input_name
+        self.imgsize = imgsize
+        images = glob.glob('datasets/val2017/*.jpg')
+        np.random.shuffle(images)
+        self.images = iter(images[:NUM_TRAINING_IMAGES])
+        self.count = 0
+        return
+
+    def get_next(
+        self: CalibrationDataset
+    ) -> Optional[Dict[str, np.ndarray]]:
+        ipath = next(self.images, None)
+        if ipath is None:
+            return None
+        rimg = load_calibration_image(
+            path=ipath, imgsize=self.imgsize, channel_first=True
+        )
+        self.count += 1
+        if self.count % 10 == 0:
+            print(f'calibrating... ({self.count}/{NUM_TRAINING_IMAGES})')
+        return {self.input_name: rimg}
+
+
+def convert_onnx_int8(
+    path_onnx: str,
+    path_quant: str,
+    imgsize: List[int]
+) -> None:
+    if not os.path.isdir('datasets/val2017'):
+        raise SystemError(
+            'you need COCO 2017 val dataset for post-training'
+        )
+    if not os.path.isfile(path_onnx):
+        return
+    if os.path.isfile(path_quant):
+        return
+    input_name = onnx.load(path_onnx).graph.input[0].name
+    # KL-divergence (entropy) calibration of activations
+    quantize_static(
+        model_input=path_onnx,
+        model_output=path_quant,
+        calibration_data_reader=CalibrationDataset(
+            input_name=input_name, imgsize=imgsize
+        ),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.Entropy
+    )
+    return
@@ -4,14 +4,12 @@ from typing import List, Optional
 import os
 import time
 import glob
-import cv2
 import numpy as np
 import tensorflow as tf
 from tensorflow.python.framework.convert_to_constants import (
     convert_variables_to_constants_v2
 )
-
-NUM_TRAINING_IMAGES = 100
+from utils.calibration import NUM_TRAINING_IMAGES, load_calibration_image
 
 
 def save_frozen_graph(
@@ -125,27 +123,7 @@ def convert_tflite_int8(
         images = glob.glob('datasets/val2017/*.jpg')
         np.random.shuffle(images)
         for i, ipath in enumerate(images[:NUM_TRAINING_IMAGES]):
-            img = cv2.imread(ipath)
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            ih = img.shape[0]
-            iw = img.shape[1]
-            scale = min(imgsize[0] / ih, imgsize[1] / iw)
-            nh = int(ih * scale)
-            nw = int(iw * scale)
-            oh = (imgsize[0] - nh) // 2
-            ow = (imgsize[1] - nw) // 2
-            if scale >= 1:
-                interpolation = cv2.INTER_CUBIC
-            else:
-                interpolation = cv2.INTER_AREA
-            nimg = cv2.resize(
-                img.copy(), (nw, nh),
-                interpolation=interpolation
-            )
-            rimg = np.full((*imgsize, 3), 128, dtype=np.uint8)
-            rimg[oh:oh + nh, ow:ow + nw, :] = nimg
-            rimg = rimg[np.newaxis, ...].astype(np.float32)
-            rimg /= 255.0
+            rimg = load_calibration_image(path=ipath, imgsize=imgsize)
             yield [rimg]
             if i % 10 == 9:
                 print(f'post-training... ({i}/{NUM_TRAINING_IMAGES})')
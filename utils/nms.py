@@ -73,7 +73,7 @@ def filter_bboxes(
             if disable_soft_nms:
                 cat_bboxes = cat_bboxes[ious < iou_threshold]
             else:
-                iou_mask = (ious >= iou_threshold).astype(np.float)
+                iou_mask = (ious >= iou_threshold).astype(np.float32)
                 cat_bboxes[:, 6] = cat_bboxes[:, 6] * (
                     1.0 - (ious * iou_mask)
                 )
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+from typing import List, Dict, Tuple
+import os
+import numpy as np
+import onnxruntime as rt
+
+
+def create_onnx_session(path_model: str) -> rt.InferenceSession:
+    # reuse the optimized graph if it is newer than the original model
+    path_opt = os.path.splitext(path_model)[0] + '.opt.onnx'
+    if not (
+        os.path.isfile(path_opt)
+    ) or (
+        os.path.getmtime(path_opt) < os.path.getmtime(path_model)
+    ):
+        # the cached graph is limited to the hardware independent
+        # optimizations because weights are copied between machines
+        so = rt.SessionOptions()
+        so.graph_optimization_level = (
+            rt.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        )
+        so.optimized_model_filepath = path_opt
+        rt.InferenceSession(
+            path_model,
+            sess_options=so,
+            providers=['CPUExecutionProvider']
+        )
+    so = rt.SessionOptions()
+    # constant folding and node fusions (including layout transformations)
+    so.graph_optimization_level = rt.GraphOptimizationLevel.ORT_ENABLE_ALL
+    so.execution_mode = rt.ExecutionMode.ORT_SEQUENTIAL
+    # hyper-threading does not help the compute-bound kernels
+    so.intra_op_num_threads = max(os.cpu_count() // 2, 1)
+    return rt.InferenceSession(
+        path_opt,
+        sess_options=so,
+        providers=['CPUExecutionProvider']
+    )
+
+
+def bind_onnx_outputs(
+    sess: rt.InferenceSession,
+    output_names: List[str],
+    input_feed: Dict[str, np.ndarray]
+) -> Tuple[rt.IOBinding, List[np.ndarray]]:
+    # ONNX Runtime writes outputs into these buffers at every run
+    # instead of allocating new arrays
+    # (run once to know the actual shapes of dynamic axes)
+    preds = sess.run(output_names=output_names, input_feed=input_feed)
+    binding = sess.io_binding()
+    buffers = list()
+    for name, pred in zip(output_names, preds):
+        assert pred.dtype == np.float32
+        buffer = np.empty(pred.shape, dtype=np.float32)
+        binding.bind_output(
+            name=name,
+            device_type='cpu',
+            device_id=0,
+            element_type=np.float32,
+            shape=buffer.shape,
+            buffer_ptr=buffer.ctypes.data
+        )
+        buffers.append(buffer)
+    return binding, buffers
@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+from typing import Dict
+import cpuinfo
+
+
+def create_vino_config() -> Dict[str, str]:
+    # CPUs with AVX-512 BF16 run the network in bfloat16
+    # (outputs are still float32)
+    flags = cpuinfo.get_cpu_info().get('flags', list())
+    if 'avx512_bf16' in flags:
+        return {'ENFORCE_BF16': 'YES'}
+    return dict()